@@ -24,20 +24,8 @@ async def apply_schema():
     conn = await asyncpg.connect(database_url)
 
     try:
-        print("Checking existing tables...")
-        existing_tables = await conn.fetch(
-            "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
-        )
-        existing_table_names = [t['tablename'] for t in existing_tables]
-
-        if 'chat_sessions' in existing_table_names and 'chat_messages' in existing_table_names:
-            print("⚠️  Tables already exist. Skipping schema creation.")
-            print(f"\nExisting tables:")
-            for table in existing_table_names:
-                print(f"  - {table}")
-            return
-
         print("Applying database schema...")
+        # The schema DDL is idempotent (IF NOT EXISTS), so no pre-check is needed.
         # Execute the entire schema as a transaction
         async with conn.transaction():
             await conn.execute(schema_sql)
@@ -48,7 +36,7 @@ async def apply_schema():
         )
 
         print("\n✅ Schema applied successfully!")
-        print(f"\nCreated tables:")
+        print(f"\nTables:")
         for table in tables:
             print(f"  - {table['tablename']}")
 
@@ -1,9 +1,11 @@
 """
 Clear Qdrant collection and reindex all documents.
 
-This script deletes the existing collection and reindexes all documentation.
+With --full, this script deletes the existing collection and reindexes all
+documentation. Without it, only files changed since the last run are reindexed.
 """
 
+import argparse
 import asyncio
 import logging
 import sys
@@ -21,13 +23,27 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def clear_and_reindex():
-    """Clear the collection and reindex all documents."""
+async def clear_and_reindex(full: bool = False):
+    """
+    Reindex all documents, optionally clearing the collection first.
+
+    Args:
+        full: Delete the collection and reindex every file
+    """
+    docs_dir = Path(__file__).parent.parent.parent / "book" / "docs"
+
+    if not full:
+        logger.info("Starting incremental reindexing...")
+        await index_documents(docs_dir)
+        logger.info("Incremental reindex complete!")
+        return
+
     vector_store = VectorStoreService()
 
     # Step 1: Delete existing collection
     logger.info("Deleting existing collection...")
     success = await vector_store.delete_collection()
+    await vector_store.close()
     if success:
         logger.info("Collection deleted successfully")
     else:
@@ -35,11 +51,17 @@ async def clear_and_reindex():
 
     # Step 2: Reindex documents
     logger.info("Starting reindexing...")
-    docs_dir = Path(__file__).parent.parent.parent / "book" / "docs"
-    await index_documents(docs_dir)
+    await index_documents(docs_dir, full=True)
 
     logger.info("Clear and reindex complete!")
 
 
 if __name__ == "__main__":
-    asyncio.run(clear_and_reindex())
+    parser = argparse.ArgumentParser(description="Clear and reindex documentation")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Delete the collection and reindex every file",
+    )
+    args = parser.parse_args()
+    asyncio.run(clear_and_reindex(args.full))
@@ -6,9 +6,14 @@ Processes markdown files, generates embeddings, and uploads to Qdrant.
 
 import asyncio
 import argparse
+import hashlib
+import json
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import aiofiles
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 import sys
 
 # Add parent directory to path
@@ -19,9 +24,8 @@ from src.services.embedding import EmbeddingService
 from src.services.vector_store import VectorStoreService
 from src.utils.markdown import (
     extract_frontmatter,
-    markdown_to_text,
+    parse_markdown,
     chunk_text,
-    get_title_from_frontmatter,
 )
 
 logging.basicConfig(
@@ -31,87 +35,488 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def index_documents(docs_dir: str, file_pattern: str = "**/*.md*"):
+async def _read_file(file_path: Path) -> str:
+    """Read a markdown file without blocking the event loop."""
+    async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+        return await f.read()
+
+
+async def _load_files(markdown_files: Iterable[Path], out: asyncio.Queue) -> None:
     """
-    Index all markdown documents in the specified directory.
+    Read files concurrently and queue their contents.
+
+    At most ``settings.read_concurrency`` reads are in flight. Each file is
+    queued as ``(path, content, error)``; a ``None`` sentinel marks the end.
 
     Args:
-        docs_dir: Path to documentation directory
-        file_pattern: Glob pattern for matching files (default: **/*.md*)
+        markdown_files: Files to read, consumed lazily
+        out: Queue receiving the loaded files
     """
-    docs_path = Path(docs_dir)
+    sem = asyncio.Semaphore(settings.read_concurrency)
 
-    if not docs_path.exists():
-        logger.error(f"Documentation directory not found: {docs_dir}")
-        return
+    async def load(file_path: Path) -> None:
+        try:
+            content = await _read_file(file_path)
+            await out.put((file_path, content, None))
+        except Exception as e:
+            await out.put((file_path, None, e))
+        finally:
+            sem.release()
 
-    # Initialize services
-    embedding_service = EmbeddingService()
-    vector_store = VectorStoreService()
+    tasks = []
+    try:
+        for file_path in markdown_files:
+            await sem.acquire()
+            tasks.append(asyncio.create_task(load(file_path)))
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        # The consumer is shutting down and won't read a sentinel; stop the
+        # reads still in flight, which may be blocked on a full queue
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    except Exception:
+        await out.put(None)
+        raise
+    await out.put(None)
 
-    # Ensure collection exists
-    await vector_store.ensure_collection_exists()
 
-    # Find all markdown files
-    markdown_files = list(docs_path.glob(file_pattern))
-    logger.info(f"Found {len(markdown_files)} markdown files")
+def _prepare_file(content: str, file_path: Path, file_path_relative: str) -> List[Dict]:
+    """
+    Chunk a single markdown file.
+
+    Args:
+        content: Raw file content
+        file_path: Path to the markdown file
+        file_path_relative: File path relative to the docs root
+
+    Returns:
+        Chunk metadata dicts (empty if the file has no text)
+    """
+    # Extract title and convert to text
+    title, text = parse_markdown(content, fallback_title=file_path.stem)
+
+    if not text.strip():
+        logger.warning(f"Skipping empty file: {file_path}")
+        return []
+
+    # Chunk text
+    chunks = chunk_text(
+        text,
+        chunk_size=settings.chunk_size,
+        overlap=settings.chunk_overlap,
+    )
+
+    logger.info(f"Processing {file_path.name}: {len(chunks)} chunks")
+
+    # Prepare chunk metadata
+    return [
+        {
+            "title": title,
+            "file_path": file_path_relative,
+            "chunk_text": chunk,
+            "chunk_index": i,
+            "total_chunks": len(chunks),
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def _load_manifest(manifest_path: Path) -> Dict[str, str]:
+    """
+    Load the ``file_path -> sha256`` manifest of already indexed files.
+
+    Args:
+        manifest_path: Manifest JSON file
 
-    total_chunks = 0
+    Returns:
+        Manifest mapping (empty if the file is missing or unreadable)
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {str(e)}")
+        return {}
+
+
+def _save_manifest(manifest_path: Path, manifest: Dict[str, str]) -> None:
+    """Write the manifest of indexed files."""
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+async def _embed_batch(
+    batch: List[Dict], embedding_service: EmbeddingService, queue: asyncio.Queue
+) -> None:
+    """
+    Embed a batch of chunks, which may span several files, and queue it for upsert.
+
+    The embedded batch is re-sliced into ``settings.upsert_batch_size`` pieces so
+    each Qdrant request stays at a fixed, tuned size.
+
+    Args:
+        batch: Chunk metadata dicts
+        embedding_service: Shared embedding service
+        queue: Queue feeding the upsert workers
+    """
+    embeddings = await embedding_service.generate_embeddings_batch(
+        [chunk["chunk_text"] for chunk in batch]
+    )
+    size = settings.upsert_batch_size
+    for i in range(0, len(batch), size):
+        await queue.put((batch[i : i + size], embeddings[i : i + size]))
+
+
+async def _upsert_worker(
+    queue: asyncio.Queue, vector_store: VectorStoreService, failed: Set[str]
+) -> int:
+    """
+    Upsert embedded batches from the queue until a ``None`` sentinel arrives.
+
+    Args:
+        queue: Queue of ``(chunks, embeddings)`` tuples
+        vector_store: Shared vector store service
+        failed: Set collecting file paths whose chunks failed to upsert
 
-    for file_path in markdown_files:
+    Returns:
+        Number of chunks upserted by this worker
+    """
+    upserted = 0
+    while True:
+        item = await queue.get()
         try:
-            # Read file content
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            if item is None:
+                return upserted
+            batch, embeddings = item
+            await vector_store.upsert_chunks(batch, embeddings)
+            upserted += len(batch)
+            logger.info(f"Indexed batch of {len(batch)} chunks")
+        except Exception as e:
+            logger.error(f"Failed to upsert batch: {str(e)}")
+            failed.update(chunk["file_path"] for chunk in batch)
+        finally:
+            queue.task_done()
+
+
+async def _run_pipeline(
+    markdown_files: Iterable[Path],
+    docs_path: Path,
+    embedding_service: EmbeddingService,
+    vector_store: VectorStoreService,
+    manifest: Dict[str, str],
+    full: bool,
+) -> Tuple[int, int]:
+    """
+    Chunk, embed and upsert the given files.
+
+    Files are read concurrently ahead of processing. Files whose content hash
+    matches ``manifest`` are skipped unless ``full``
+    is set. Chunks are pooled across files into batches of
+    ``settings.embed_batch_size``; up to ``settings.index_concurrency`` batches
+    are embedded at once, and reading pauses while that many are outstanding,
+    so embeddings are never held for the whole corpus.
+    ``settings.upsert_concurrency`` workers upsert finished batches while
+    embedding continues. ``manifest`` is updated in place with the hashes of
+    files that were indexed successfully.
 
-            # Extract title and convert to text
-            title = get_title_from_frontmatter(content, fallback=file_path.stem)
-            text = markdown_to_text(content)
+    Args:
+        markdown_files: Files to index, consumed lazily
+        docs_path: Documentation root, used for relative file paths
+        embedding_service: Shared embedding service
+        vector_store: Shared vector store service
+        manifest: ``file_path -> sha256`` of previously indexed files
+        full: Re-index every file and skip stale-chunk cleanup
 
-            if not text.strip():
-                logger.warning(f"Skipping empty file: {file_path}")
+    Returns:
+        Tuple of (files seen, chunks indexed)
+    """
+    sem = asyncio.Semaphore(settings.index_concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.upsert_concurrency * 2)
+    failed: Set[str] = set()
+    workers = [
+        asyncio.create_task(_upsert_worker(queue, vector_store, failed))
+        for _ in range(settings.upsert_concurrency)
+    ]
+
+    batch_size = settings.embed_batch_size
+    embed_tasks: Set[asyncio.Task] = set()
+    pending: List[Dict] = []
+    indexed_hashes: Dict[str, str] = {}
+    file_count = 0
+    skipped = 0
+
+    async def flush(batch: List[Dict]) -> None:
+        # Wait for a free slot; the slot is held until the batch is queued
+        # for upsert, which bounds the embeddings kept in memory
+        await sem.acquire()
+        task = asyncio.create_task(_embed_batch(batch, embedding_service, queue))
+        embed_tasks.add(task)
+
+        def on_done(done: asyncio.Task) -> None:
+            sem.release()
+            embed_tasks.discard(done)
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Failed to embed batch: {str(done.exception())}")
+                failed.update(chunk["file_path"] for chunk in batch)
+
+        task.add_done_callback(on_done)
+
+    # Load stage: reads run ahead of chunking/embedding
+    loaded: asyncio.Queue = asyncio.Queue(maxsize=settings.read_concurrency * 2)
+    loader = asyncio.create_task(_load_files(markdown_files, loaded))
+
+    try:
+        while True:
+            item = await loaded.get()
+            if item is None:
+                break
+            file_path, content, error = item
+            file_count += 1
+            file_path_relative = str(file_path.relative_to(docs_path))
+            try:
+                if error is not None:
+                    raise error
+                content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                if not full and manifest.get(file_path_relative) == content_hash:
+                    skipped += 1
+                    continue
+
+                chunks = _prepare_file(content, file_path, file_path_relative)
+                if not full and file_path_relative in manifest:
+                    # Drop chunks from a previous version of this file; files
+                    # never indexed have none, so skip the round-trip
+                    await vector_store.delete_file_chunks(file_path_relative)
+            except Exception as e:
+                logger.error(f"Failed to index {file_path}: {str(e)}")
                 continue
 
-            # Chunk text
-            chunks = chunk_text(
-                text,
-                chunk_size=settings.chunk_size,
-                overlap=settings.chunk_overlap,
+            indexed_hashes[file_path_relative] = content_hash
+            pending.extend(chunks)
+            while len(pending) >= batch_size:
+                await flush(pending[:batch_size])
+                pending = pending[batch_size:]
+
+        # Surface any error from walking the file list
+        await loader
+
+        # Flush the final partial batch
+        if pending:
+            await flush(pending)
+
+        if skipped:
+            logger.info(f"Skipped {skipped} unchanged files")
+
+        # Failures are recorded by each task's done callback
+        await asyncio.gather(*embed_tasks, return_exceptions=True)
+
+        # Stop the upsert workers once every queued batch is handled
+        for _ in workers:
+            await queue.put(None)
+        await queue.join()
+        total_chunks = sum(await asyncio.gather(*workers))
+    finally:
+        # On error, stop the reads, embeddings and upserts still running
+        leftover = [task for task in (loader, *embed_tasks, *workers) if not task.done()]
+        for task in leftover:
+            task.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+
+    # Only record files whose chunks all made it into Qdrant
+    for file_path_relative, content_hash in indexed_hashes.items():
+        if file_path_relative in failed:
+            manifest.pop(file_path_relative, None)
+        else:
+            manifest[file_path_relative] = content_hash
+
+    return file_count, total_chunks
+
+
+def _index_shard(
+    shard: List[str], docs_dir: str, manifest: Dict[str, str], full: bool
+) -> Tuple[int, int, Dict[str, str]]:
+    """
+    Index a shard of files in a worker process.
+
+    Each worker runs its own event loop with its own embedding and Qdrant
+    clients, so connections scale with the number of workers.
+
+    Args:
+        shard: Absolute paths of the files in this shard
+        docs_dir: Documentation root, used for relative file paths
+        manifest: Manifest entries for the files in this shard
+        full: Re-index every file regardless of the manifest
+
+    Returns:
+        Tuple of (files seen, chunks indexed, updated manifest entries)
+    """
+
+    async def run() -> Tuple[int, int]:
+        embedding_service = EmbeddingService()
+        vector_store = VectorStoreService()
+        try:
+            return await _run_pipeline(
+                [Path(p) for p in shard],
+                Path(docs_dir),
+                embedding_service,
+                vector_store,
+                manifest,
+                full,
             )
+        finally:
+            await embedding_service.close()
+            await vector_store.close()
 
-            logger.info(f"Processing {file_path.name}: {len(chunks)} chunks")
+    file_count, total_chunks = asyncio.run(run())
+    return file_count, total_chunks, manifest
 
-            # Prepare chunk metadata
-            file_path_relative = str(file_path.relative_to(docs_path))
-            chunk_metadata_list = [
-                {
-                    "title": title,
-                    "file_path": file_path_relative,
-                    "chunk_text": chunk,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                }
-                for i, chunk in enumerate(chunks)
+
+async def _run_sharded(
+    docs_path: Path, file_pattern: str, manifest: Dict[str, str], full: bool, workers: int
+) -> Tuple[int, int]:
+    """
+    Index files across ``workers`` processes.
+
+    ``manifest`` is updated in place with the entries returned by each worker.
+
+    Args:
+        docs_path: Documentation root
+        file_pattern: Glob pattern for matching files
+        manifest: ``file_path -> sha256`` of previously indexed files
+        full: Re-index every file regardless of the manifest
+        workers: Number of worker processes
+
+    Returns:
+        Tuple of (files seen, chunks indexed)
+    """
+    markdown_files = list(docs_path.glob(file_pattern))
+    # Stripe files across workers so shard sizes stay balanced
+    shards = [
+        [str(p) for p in markdown_files[i::workers]]
+        for i in range(workers)
+        if markdown_files[i::workers]
+    ]
+
+    loop = asyncio.get_running_loop()
+    # Spawn rather than fork: the parent already holds a gRPC channel and
+    # HTTP/2 pools, and gRPC state does not survive a fork
+    with ProcessPoolExecutor(
+        max_workers=len(shards) or 1, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    pool,
+                    _index_shard,
+                    shard,
+                    str(docs_path),
+                    {
+                        rel: manifest[rel]
+                        for rel in (str(Path(p).relative_to(docs_path)) for p in shard)
+                        if rel in manifest
+                    },
+                    full,
+                )
+                for shard in shards
             ]
+        )
 
-            # Generate embeddings in batch
-            embeddings = await embedding_service.generate_embeddings_batch(chunks)
+    file_count = total_chunks = 0
+    for shard, (shard_files, shard_chunks, shard_manifest) in zip(shards, results):
+        file_count += shard_files
+        total_chunks += shard_chunks
+        for p in shard:
+            manifest.pop(str(Path(p).relative_to(docs_path)), None)
+        manifest.update(shard_manifest)
 
-            # Upsert to Qdrant
-            await vector_store.upsert_chunks(chunk_metadata_list, embeddings)
+    return file_count, total_chunks
 
-            total_chunks += len(chunks)
-            logger.info(f"Indexed {file_path.name} ({len(chunks)} chunks)")
 
-        except Exception as e:
-            logger.error(f"Failed to index {file_path}: {str(e)}")
-            continue
+async def index_documents(
+    docs_dir: str,
+    file_pattern: str = "**/*.md*",
+    manifest_path: Optional[str] = ".index_manifest.json",
+    full: bool = False,
+    workers: int = 1,
+):
+    """
+    Index all markdown documents in the specified directory.
 
-    logger.info(f"Indexing complete: {len(markdown_files)} files, {total_chunks} chunks")
+    Unchanged files recorded in the manifest are skipped. HNSW indexing is
+    paused for the duration of the upload and restored afterwards.
+
+    Args:
+        docs_dir: Path to documentation directory
+        file_pattern: Glob pattern for matching files (default: **/*.md*)
+        manifest_path: Manifest of indexed file hashes (None disables it)
+        full: Re-index every file regardless of the manifest
+        workers: Number of processes to split files across (1 runs in-process)
+    """
+    docs_path = Path(docs_dir)
+
+    if not docs_path.exists():
+        logger.error(f"Documentation directory not found: {docs_dir}")
+        return
+
+    # Initialize services
+    embedding_service = EmbeddingService()
+    vector_store = VectorStoreService()
+
+    # Ensure collection exists. A new collection is loaded with HNSW disabled
+    # (m=0) and its graph built once at the end; an existing one keeps its
+    # graph, since toggling m would rebuild it for an incremental run.
+    created = await vector_store.ensure_collection_exists(bulk=True)
+
+    # A just-created collection holds none of the manifest's files
+    if full or created or manifest_path is None:
+        manifest = {}
+    else:
+        manifest = _load_manifest(Path(manifest_path))
+
+    # Pause HNSW indexing during bulk upload; restore the collection's own
+    # threshold afterwards, even if indexing fails. A 0 means an earlier run
+    # died mid-ingest, so fall back to the configured value.
+    indexing_threshold = await vector_store.get_indexing_threshold()
+    if not indexing_threshold:
+        indexing_threshold = settings.qdrant_indexing_threshold
+    await vector_store.set_indexing_threshold(0)
+    try:
+        if workers > 1:
+            file_count, total_chunks = await _run_sharded(
+                docs_path, file_pattern, manifest, full, workers
+            )
+        else:
+            # Stream matching files so work starts before the walk finishes
+            file_count, total_chunks = await _run_pipeline(
+                docs_path.glob(file_pattern),
+                docs_path,
+                embedding_service,
+                vector_store,
+                manifest,
+                full,
+            )
+    finally:
+        if created:
+            await vector_store.set_hnsw_m(settings.qdrant_hnsw_m)
+        await vector_store.set_indexing_threshold(indexing_threshold)
+        await embedding_service.close()
+
+    if manifest_path is not None:
+        _save_manifest(Path(manifest_path), manifest)
+
+    logger.info(f"Indexing complete: {file_count} files, {total_chunks} chunks")
+
+    if created:
+        logger.info("Waiting for HNSW index build...")
+        await vector_store.wait_until_indexed()
 
     # Get collection info
     collection_info = await vector_store.get_collection_info()
     logger.info(f"Collection stats: {collection_info}")
+    await vector_store.close()
 
 
 async def main():
@@ -129,11 +534,30 @@ async def main():
         default="**/*.md*",
         help="File pattern to match (default: **/*.md*)",
     )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=".index_manifest.json",
+        help="Manifest of indexed file hashes (default: .index_manifest.json)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-index every file, ignoring the manifest",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of indexing processes (default: 1)",
+    )
 
     args = parser.parse_args()
 
     logger.info("Starting documentation indexing...")
-    await index_documents(args.docs_dir, args.pattern)
+    await index_documents(
+        args.docs_dir, args.pattern, args.manifest, args.full, args.workers
+    )
     logger.info("Indexing complete")
 
 
@@ -0,0 +1,55 @@
+"""
+Apply index migrations to an existing database.
+
+create_all() only creates indexes together with new tables, so index changes
+to existing tables are applied here. Statements use CONCURRENTLY so they don't
+block writes, and IF [NOT] EXISTS so the script is safe to re-run.
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from src.services.conversation import get_engine
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    # Composite index for conversation history lookups
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_session_created "
+    "ON chat_messages (session_id, created_at)",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_messages_session",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_messages_created",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_messages_role",
+    # Containment (@>) lookups on retrieved sources
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_context_gin "
+    "ON chat_messages USING gin (context_used jsonb_path_ops)",
+]
+
+
+async def migrate_indexes():
+    """Apply all index migrations."""
+    engine = get_engine()
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in MIGRATIONS:
+                logger.info(f"Applying: {statement}")
+                await conn.execute(text(statement))
+        logger.info("Index migrations complete")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_indexes())
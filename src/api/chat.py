@@ -1,13 +1,18 @@
 """
 Chat endpoint.
 
-Handles user queries and returns AI-generated responses with sources.
+Handles user queries and returns AI-generated responses with sources,
+either as one JSON response or streamed as server-sent events.
 """
 
 import logging
 from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
 from uuid import UUID
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from src.api.dependencies import get_rag_service
 from src.models.chat import ChatRequest, ChatResponse
 from src.services.rag_service import RAGService
 from src.utils.sanitization import sanitize_query, sanitize_selected_text, validate_session_id, detect_prompt_injection
@@ -17,13 +22,71 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _validate_request(request: ChatRequest) -> Tuple[str, Optional[str], Optional[UUID]]:
+    """
+    Sanitize and validate a chat request.
+
+    Args:
+        request: Chat request
+
+    Returns:
+        Tuple of (sanitized query, sanitized selected text, session ID)
+
+    Raises:
+        HTTPException: 400 if the request is invalid or looks like prompt injection
+    """
+    # Sanitize and validate query
+    try:
+        sanitized_query = sanitize_query(request.message, max_length=1000)
+    except ValueError as e:
+        logger.warning(f"Query validation failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Detect prompt injection
+    if detect_prompt_injection(sanitized_query):
+        logger.warning(f"Prompt injection detected: {sanitized_query[:100]}")
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid query: Your message contains patterns that could be harmful.",
+        )
+
+    # Sanitize selected text if present
+    sanitized_selected_text = None
+    if request.selected_text:
+        sanitized_selected_text = sanitize_selected_text(
+            request.selected_text, min_length=1, max_length=1000
+        )
+        if sanitized_selected_text is None:
+            logger.warning("Selected text validation failed")
+            raise HTTPException(
+                status_code=400,
+                detail="Selected text must be between 1-1000 characters",
+            )
+
+    # Validate session ID if provided
+    session_id = None
+    if request.session_id:
+        if not validate_session_id(request.session_id):
+            logger.warning(f"Invalid session ID format: {request.session_id}")
+            raise HTTPException(status_code=400, detail="Invalid session ID format")
+        session_id = UUID(request.session_id)
+
+    return sanitized_query, sanitized_selected_text, session_id
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """Encode one server-sent event frame."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
     """
     Process user query and return AI-generated response with sources.
 
     Args:
         request: Chat request with message, optional session_id, optional selected_text
+        rag_service: Shared RAG service
 
     Returns:
         Chat response with session_id, message, sources, and timestamp
@@ -35,44 +98,9 @@ async def chat(request: ChatRequest):
         500: Server error
     """
     try:
-        # Sanitize and validate query
-        try:
-            sanitized_query = sanitize_query(request.message, max_length=1000)
-        except ValueError as e:
-            logger.warning(f"Query validation failed: {str(e)}")
-            raise HTTPException(status_code=400, detail=str(e))
-
-        # Detect prompt injection
-        if detect_prompt_injection(sanitized_query):
-            logger.warning(f"Prompt injection detected: {sanitized_query[:100]}")
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid query: Your message contains patterns that could be harmful.",
-            )
-
-        # Sanitize selected text if present
-        sanitized_selected_text = None
-        if request.selected_text:
-            sanitized_selected_text = sanitize_selected_text(
-                request.selected_text, min_length=1, max_length=1000
-            )
-            if sanitized_selected_text is None:
-                logger.warning("Selected text validation failed")
-                raise HTTPException(
-                    status_code=400,
-                    detail="Selected text must be between 1-1000 characters",
-                )
-
-        # Validate session ID if provided
-        session_id = None
-        if request.session_id:
-            if not validate_session_id(request.session_id):
-                logger.warning(f"Invalid session ID format: {request.session_id}")
-                raise HTTPException(status_code=400, detail="Invalid session ID format")
-            session_id = UUID(request.session_id)
+        sanitized_query, sanitized_selected_text, session_id = _validate_request(request)
 
         # Process query through RAG pipeline
-        rag_service = RAGService()
         response_text, sources, final_session_id = await rag_service.process_query(
             query=sanitized_query,
             session_id=session_id,
@@ -96,3 +124,55 @@ async def chat(request: ChatRequest):
             status_code=500,
             detail="An error occurred while processing your request. Please try again.",
         )
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """
+    Process user query and stream the AI-generated response as server-sent events.
+
+    Events, in order: ``sources`` (session_id and sources), one ``token`` per
+    response fragment, then ``done`` (timestamp). If the pipeline fails after
+    streaming has started, an ``error`` event replaces ``done``.
+
+    Args:
+        request: Chat request with message, optional session_id, optional selected_text
+        rag_service: Shared RAG service
+
+    Returns:
+        Streaming response with media type text/event-stream
+
+    Status Codes:
+        200: Stream started
+        400: Invalid input (validation error, prompt injection detected)
+    """
+    sanitized_query, sanitized_selected_text, session_id = _validate_request(request)
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        try:
+            async for event, data in rag_service.process_query_stream(
+                query=sanitized_query,
+                session_id=session_id,
+                selected_text=sanitized_selected_text,
+            ):
+                if event == "sources":
+                    sources, final_session_id = data
+                    yield _sse(
+                        "sources",
+                        {
+                            "session_id": str(final_session_id),
+                            "sources": [source.model_dump() for source in sources],
+                        },
+                    )
+                else:
+                    yield _sse("token", {"text": data})
+            yield _sse("done", {"timestamp": datetime.utcnow().isoformat()})
+
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}", exc_info=True)
+            yield _sse(
+                "error",
+                {"detail": "An error occurred while processing your request. Please try again."},
+            )
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
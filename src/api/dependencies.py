@@ -0,0 +1,38 @@
+"""
+Shared service dependencies.
+
+Services are created once during application startup and stored on
+``app.state``; these helpers hand the cached instances to endpoints.
+"""
+
+from fastapi import Request
+from src.services.conversation import ConversationService
+from src.services.embedding import EmbeddingService
+from src.services.llm import LLMService
+from src.services.rag_service import RAGService
+from src.services.vector_store import VectorStoreService
+
+
+def get_rag_service(request: Request) -> RAGService:
+    """Return the application-wide RAG service."""
+    return request.app.state.rag_service
+
+
+def get_embedding_service(request: Request) -> EmbeddingService:
+    """Return the application-wide embedding service."""
+    return request.app.state.embedding_service
+
+
+def get_vector_store(request: Request) -> VectorStoreService:
+    """Return the application-wide vector store service."""
+    return request.app.state.vector_store
+
+
+def get_llm_service(request: Request) -> LLMService:
+    """Return the application-wide LLM service."""
+    return request.app.state.llm_service
+
+
+def get_conversation_service(request: Request) -> ConversationService:
+    """Return the application-wide conversation service."""
+    return request.app.state.conversation_service
@@ -5,8 +5,9 @@ Provides health status for all backend services.
 """
 
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from src.api.dependencies import get_rag_service
 from src.services.rag_service import RAGService
 
 logger = logging.getLogger(__name__)
@@ -22,19 +23,18 @@ class HealthResponse(BaseModel):
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(rag_service: RAGService = Depends(get_rag_service)):
     """
     Check health of all backend services.
 
     Returns:
-        Health status of Qdrant, Postgres, and OpenAI
+        Health status of Qdrant, Postgres, and Gemini
 
     Status Codes:
         200: All services healthy
         503: One or more services unavailable
     """
     try:
-        rag_service = RAGService()
         services = await rag_service.check_health()
 
         # Determine overall status
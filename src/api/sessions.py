@@ -6,7 +6,8 @@ Retrieves conversation history for a given session.
 
 import logging
 from uuid import UUID
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from src.api.dependencies import get_rag_service
 from src.models.chat import SessionHistoryResponse, ChatMessage
 from src.services.rag_service import RAGService
 from src.utils.sanitization import validate_session_id
@@ -17,12 +18,15 @@ router = APIRouter()
 
 
 @router.get("/sessions/{session_id}/history", response_model=SessionHistoryResponse)
-async def get_session_history(session_id: str):
+async def get_session_history(
+    session_id: str, rag_service: RAGService = Depends(get_rag_service)
+):
     """
     Get conversation history for a session.
 
     Args:
         session_id: Session ID (UUID)
+        rag_service: Shared RAG service
 
     Returns:
         Session history with all messages in chronological order
@@ -42,7 +46,6 @@ async def get_session_history(session_id: str):
         session_uuid = UUID(session_id)
 
         # Get conversation history
-        rag_service = RAGService()
         messages = await rag_service.get_session_history(session_uuid)
 
         if not messages:
@@ -4,9 +4,14 @@ Configuration management for RAG chatbot backend.
 Loads environment variables using Pydantic Settings for type-safe configuration.
 """
 
+from functools import cached_property
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# libpq-only URL parameters that asyncpg rejects
+_LIBPQ_ONLY_PARAMS = {"sslmode", "channel_binding"}
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -21,6 +26,21 @@ class Settings(BaseSettings):
     gemini_chat_model: str = Field(default="gemini-2.5-flash", description="Gemini chat model")
     # NOTE: gemini-embedding-001 has a dimension of 3072
     gemini_embedding_dimension: int = Field(default=3072, description="Embedding vector dimension")
+    gemini_http_max_connections: int = Field(
+        default=100, description="Max pooled HTTP/2 connections to the Gemini API"
+    )
+    gemini_http_timeout: float = Field(
+        default=30.0, description="Gemini HTTP request timeout in seconds"
+    )
+    embedding_cache_size: int = Field(
+        default=1024, description="Max query embeddings kept in the in-process LRU cache"
+    )
+    embedding_sub_batch_size: int = Field(
+        default=100, description="Max texts per Gemini embed_content request"
+    )
+    embedding_max_concurrency: int = Field(
+        default=5, description="Max concurrent Gemini embedding requests per batch"
+    )
 
     # --- Configuration from original script (Kept as is) ---
     
@@ -30,12 +50,48 @@ class Settings(BaseSettings):
     qdrant_collection_name: str = Field(
         default="ai_native_book", description="Qdrant collection name"
     )
+    qdrant_prefer_grpc: bool = Field(
+        default=True, description="Talk to Qdrant over gRPC (HTTP/2, protobuf) instead of REST"
+    )
+    qdrant_grpc_port: int = Field(default=6334, description="Qdrant gRPC port")
+    qdrant_http_max_connections: int = Field(
+        default=50, description="Max pooled HTTP/2 connections for Qdrant REST calls"
+    )
+    qdrant_http_max_keepalive: int = Field(
+        default=20, description="Idle Qdrant REST connections kept alive for reuse"
+    )
+    qdrant_health_timeout: float = Field(
+        default=2.0, description="Seconds before a Qdrant health check counts as down"
+    )
+    qdrant_quantization: bool = Field(
+        default=True, description="Store int8 scalar-quantized vectors alongside originals"
+    )
+    qdrant_oversampling: float = Field(
+        default=2.0,
+        description="Candidates fetched per result from quantized vectors before rescoring",
+    )
+    qdrant_hnsw_m: int = Field(
+        default=16, description="HNSW edges per node, applied after a bulk load"
+    )
+    qdrant_indexing_threshold: int = Field(
+        default=20000,
+        description="Indexing threshold restored after bulk ingest if the server reports none",
+    )
 
     # Neon Postgres Configuration
     database_url: str = Field(..., description="PostgreSQL connection URL")
-    database_pool_size: int = Field(default=10, description="Database connection pool size")
+    database_pool_size: int = Field(
+        default=20, description="Database connection pool size (size for peak concurrency)"
+    )
     database_max_overflow: int = Field(
-        default=20, description="Max overflow connections beyond pool size"
+        default=0, description="Max overflow connections beyond pool size"
+    )
+    database_pool_recycle: int = Field(
+        default=300, description="Seconds before a pooled connection is replaced"
+    )
+    database_disable_jit: bool = Field(
+        default=False,
+        description="Send jit=off as a startup parameter (unsupported by PgBouncer/Neon poolers)",
     )
 
     # Application Configuration
@@ -53,21 +109,59 @@ class Settings(BaseSettings):
     similarity_threshold: float = Field(
         default=0.6, description="Minimum similarity threshold for retrieval"
     )
+    retrieval_cache_size: int = Field(
+        default=2048, description="Max cached retrieval results"
+    )
+    retrieval_cache_ttl: int = Field(
+        default=300, description="Seconds a cached retrieval result stays valid"
+    )
+    retrieval_cache_simhash_bits: int = Field(
+        default=0,
+        description="SimHash bits keying cached retrieval results (0 keys on the exact embedding)",
+    )
+    retrieval_cache_min_similarity: float = Field(
+        default=0.99,
+        description="Min cosine similarity for a SimHash bucket hit to reuse cached results",
+    )
     max_query_length: int = Field(default=1000, description="Maximum query length in characters")
     max_conversation_context: int = Field(
         default=6, description="Max conversation history messages for context"
     )
 
+    # Indexing Configuration
+    read_concurrency: int = Field(
+        default=32, description="Max markdown files read concurrently while indexing"
+    )
+    index_concurrency: int = Field(
+        default=8, description="Max embedding batches in flight while indexing"
+    )
+    embed_batch_size: int = Field(
+        default=256, description="Chunks per embedding request, pooled across files"
+    )
+    upsert_batch_size: int = Field(
+        default=64, description="Points per Qdrant upsert request"
+    )
+    upsert_concurrency: int = Field(
+        default=2, description="Concurrent Qdrant upsert workers while indexing"
+    )
+
     # Rate Limiting
     rate_limit_queries_per_hour: int = Field(
         default=60, description="Max queries per hour per IP"
     )
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> list[str]:
-        """Parse CORS origins string into list."""
+        """Parse CORS origins string into list (computed once)."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @cached_property
+    def database_url_asyncpg(self) -> str:
+        """SQLAlchemy asyncpg URL without libpq-only query parameters (computed once)."""
+        parts = urlsplit(self.database_url)
+        query = [(k, v) for k, v in parse_qsl(parts.query) if k not in _LIBPQ_ONLY_PARAMS]
+        return urlunsplit(parts._replace(scheme="postgresql+asyncpg", query=urlencode(query)))
+
 
 # Global settings instance
 settings = Settings()
\ No newline at end of file
@@ -8,10 +8,10 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from src.api import health, chat, sessions, debug
 from src.config import settings
-from src.services.conversation import ConversationService
-from src.services.vector_store import VectorStoreService
+from src.services.rag_service import RAGService
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +27,7 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
 
     Startup:
+        - Create shared service instances on app.state
         - Initialize database tables
         - Verify Qdrant collection exists
 
@@ -37,14 +38,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting RAG chatbot backend...")
 
     try:
+        # Create services once; endpoints reuse them via src.api.dependencies
+        rag_service = RAGService()
+        app.state.rag_service = rag_service
+        app.state.embedding_service = rag_service.embedding_service
+        app.state.vector_store = rag_service.vector_store
+        app.state.llm_service = rag_service.llm_service
+        app.state.conversation_service = rag_service.conversation_service
+
         # Initialize database
-        conversation_service = ConversationService()
-        await conversation_service.create_tables()
+        await rag_service.conversation_service.create_tables()
         logger.info("Database initialized")
 
         # Ensure Qdrant collection exists
-        vector_store = VectorStoreService()
-        await vector_store.ensure_collection_exists()
+        await rag_service.vector_store.ensure_collection_exists()
         logger.info("Vector store initialized")
 
     except Exception as e:
@@ -57,6 +64,11 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down backend...")
+    # Let streamed responses finish persisting before the pool goes away
+    await rag_service.wait_for_background_tasks()
+    await rag_service.embedding_service.close()
+    await rag_service.vector_store.close()
+    await rag_service.conversation_service.engine.dispose()
 
 
 # Create FastAPI application
@@ -65,12 +77,9 @@ app = FastAPI(
     description="Backend API for Physical AI & Humanoid Robotics documentation chatbot",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-@app.get("/")
-def home():
-    return {"status": "backend running"}
-
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -82,16 +91,18 @@ app.add_middleware(
 logger.info(f"CORS configured for origins: {settings.cors_origins_list}")
 
 
-# Request logging middleware
-@app.middleware("http")
+# Request logging middleware (debug only; uvicorn's access log covers normal runs)
 async def log_requests(request, call_next):
     """Log all incoming requests."""
-    logger.info(f"{request.method} {request.url.path}")
     response = await call_next(request)
-    logger.info(f"{request.method} {request.url.path} - {response.status_code}")
+    logger.debug(f"{request.method} {request.url.path} - {response.status_code}")
     return response
 
 
+if logger.isEnabledFor(logging.DEBUG):
+    app.middleware("http")(log_requests)
+
+
 # Register routers
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
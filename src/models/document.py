@@ -1,45 +1,46 @@
 """
 Document domain models.
 
-Pydantic models for document chunks and sources in the vector database.
+Lightweight containers for document chunks and sources in the vector database.
+These are built once per chunk during indexing and never cross the HTTP
+boundary, so they skip Pydantic validation.
 """
 
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, TypedDict
 from uuid import UUID
-from pydantic import BaseModel, Field
+import numpy as np
 
 
-class DocumentChunk(BaseModel):
+@dataclass
+class DocumentChunk:
     """Document chunk stored in vector database."""
 
-    chunk_id: UUID = Field(description="Unique chunk identifier")
-    title: str = Field(description="Document title")
-    file_path: str = Field(description="File path relative to docs/")
-    chunk_text: str = Field(description="Chunk text content")
-    chunk_index: int = Field(ge=0, description="Chunk index in document")
-    total_chunks: int = Field(gt=0, description="Total chunks in document")
-    embedding: Optional[list[float]] = Field(
-        default=None, description="Embedding vector (1536 dimensions)"
-    )
-    metadata: dict = Field(default_factory=dict, description="Additional metadata")
+    chunk_id: UUID  # Unique chunk identifier
+    title: str  # Document title
+    file_path: str  # File path relative to docs/
+    chunk_text: str  # Chunk text content
+    chunk_index: int  # Chunk index in document (>= 0)
+    total_chunks: int  # Total chunks in document (> 0)
+    embedding: Optional[np.ndarray] = None  # Embedding vector (float32, 3072 dimensions)
+    metadata: dict = field(default_factory=dict)  # Additional metadata
 
-    model_config = {"from_attributes": True}
 
-
-class DocumentMetadata(BaseModel):
+@dataclass(frozen=True)
+class DocumentMetadata:
     """Metadata for document indexing."""
 
-    file_path: str = Field(description="File path relative to docs/")
-    title: str = Field(description="Document title")
-    sidebar_position: Optional[int] = Field(default=None, description="Sidebar position from frontmatter")
-    last_modified: Optional[str] = Field(default=None, description="Last modified timestamp")
+    file_path: str  # File path relative to docs/
+    title: str  # Document title
+    sidebar_position: Optional[int] = None  # Sidebar position from frontmatter
+    last_modified: Optional[str] = None  # Last modified timestamp
 
 
-class ChunkPayload(BaseModel):
+class ChunkPayload(TypedDict):
     """Payload for storing chunks in Qdrant."""
 
-    title: str = Field(description="Document title")
-    file_path: str = Field(description="File path")
-    chunk_index: int = Field(description="Chunk index")
-    total_chunks: int = Field(description="Total chunks")
-    chunk_text: str = Field(description="Chunk text")
+    title: str
+    file_path: str
+    chunk_index: int
+    total_chunks: int
+    chunk_text: str
@@ -0,0 +1,50 @@
+"""
+Shared Gemini API client.
+
+EmbeddingService and LLMService share one async client, so both reuse the
+same pooled HTTP/2 connections to the Gemini API.
+"""
+
+from typing import Optional
+import httpx
+from google import genai
+from google.genai import types as genai_types
+from src.config import settings
+
+_http_client: Optional[httpx.AsyncClient] = None
+_client = None
+
+
+def get_client():
+    """
+    Get the process-wide async Gemini client, creating it on first use.
+
+    Returns:
+        Async Gemini client (``genai.Client(...).aio``)
+    """
+    global _http_client, _client
+    if _client is None:
+        # One keep-alive HTTP/2 client multiplexes concurrent requests over a
+        # pooled connection instead of paying TLS setup per call
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.gemini_http_max_connections,
+                max_keepalive_connections=settings.gemini_http_max_connections,
+            ),
+            timeout=settings.gemini_http_timeout,
+        )
+        _client = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=genai_types.HttpOptions(httpx_async_client=_http_client),
+        ).aio
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client; the next get_client() call opens a new one."""
+    global _http_client, _client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _client = None
@@ -5,8 +5,10 @@ Manages chat sessions and messages in Postgres database.
 """
 
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict
+import ssl
+from datetime import datetime, timedelta
+import orjson
+from typing import List, Optional, Dict, Tuple
 from uuid import UUID, uuid4
 from sqlalchemy import (
     Column,
@@ -18,9 +20,14 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import select, func
+from sqlalchemy import insert, literal, select
 from src.config import settings
 
 logger = logging.getLogger(__name__)
@@ -47,7 +54,14 @@ class ChatSessionModel(Base):
 
 
 class ChatMessageModel(Base):
-    """SQLAlchemy model for chat_messages table."""
+    """
+    SQLAlchemy model for chat_messages table.
+
+    ``context_used`` has a GIN ``jsonb_path_ops`` index, which only serves
+    containment queries: filter with
+    ``context_used @> '{"chunks": [{"file_path": "..."}]}'`` rather than
+    ``->>`` extraction so the planner can use it.
+    """
 
     __tablename__ = "chat_messages"
 
@@ -64,31 +78,100 @@ class ChatMessageModel(Base):
     __table_args__ = (
         CheckConstraint("role IN ('user', 'assistant')", name="chk_valid_role"),
         CheckConstraint("LENGTH(content) >= 1 AND LENGTH(content) <= 10000", name="chk_content_length"),
-        Index("idx_messages_session", "session_id"),
-        Index("idx_messages_created", "created_at"),
-        Index("idx_messages_role", "role"),
+        # Serves WHERE session_id = ? ORDER BY created_at without a sort
+        Index("idx_messages_session_created", "session_id", "created_at"),
+        Index(
+            "idx_messages_context_gin",
+            "context_used",
+            postgresql_using="gin",
+            postgresql_ops={"context_used": "jsonb_path_ops"},
+        ),
     )
 
 
-class ConversationService:
-    """Service for managing conversations in Postgres."""
+def _build_ssl_context() -> ssl.SSLContext:
+    """Build an SSL context equivalent to libpq's sslmode=require."""
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+_SSL_CONTEXT = _build_ssl_context()
+
+
+def _json_serializer(value) -> str:
+    """Serialize JSONB values with orjson."""
+    return orjson.dumps(value).decode()
+
 
-    def __init__(self):
-        """Initialize database connection."""
-        # Convert postgresql:// to postgresql+asyncpg:// for SQLAlchemy async
-        # Remove sslmode/channel_binding parameters as asyncpg doesn't support them
-        import re
-        db_url = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
-        db_url = re.sub(r'[?&](sslmode|channel_binding)=[^&]*', '', db_url)
-        # Clean up any trailing ? or &
-        db_url = re.sub(r'[?&]$', '', db_url)
-        self.engine = create_async_engine(
-            db_url,
+_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Get the process-wide async engine, creating it on first use.
+
+    The engine owns the asyncpg connection pool, so sharing it means every
+    ConversationService reuses the same pooled connections.
+
+    Returns:
+        Shared async engine
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.database_url_asyncpg,
             pool_size=settings.database_pool_size,
             max_overflow=settings.database_max_overflow,
+            pool_recycle=settings.database_pool_recycle,
+            pool_pre_ping=False,
             echo=False,
-            connect_args={"ssl": "require"},
+            # The asyncpg dialect's jsonb codec delegates to these
+            json_serializer=_json_serializer,
+            json_deserializer=orjson.loads,
+            connect_args={
+                "ssl": _SSL_CONTEXT,
+                # Short OLTP queries never benefit from JIT compilation, but
+                # poolers reject unknown startup parameters; behind one, use
+                # ALTER ROLE ... SET jit = off instead
+                "server_settings": {"jit": "off"} if settings.database_disable_jit else {},
+                # Cache prepared statements so repeat queries skip parse/plan
+                "statement_cache_size": 1024,
+                "prepared_statement_cache_size": 500,
+            },
         )
+    return _engine
+
+
+def _message_rows(session_id: UUID, messages: List[Dict], created_at: datetime) -> List[Dict]:
+    """Build chat_messages rows with client-side IDs, preserving list order."""
+    return [
+        {
+            "message_id": uuid4(),
+            "session_id": session_id,
+            "role": message["role"],
+            "content": message["content"],
+            "selected_text": message.get("selected_text"),
+            "context_used": message.get("context_used"),
+            # Offset timestamps so history order matches list order
+            "created_at": created_at + timedelta(microseconds=i),
+        }
+        for i, message in enumerate(messages)
+    ]
+
+
+class ConversationService:
+    """Service for managing conversations in Postgres."""
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        """
+        Initialize database session factory.
+
+        Args:
+            engine: Optional engine to use instead of the shared one
+        """
+        self.engine = engine or get_engine()
         self.async_session = async_sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
@@ -107,17 +190,57 @@ class ConversationService:
             New session ID
         """
         try:
+            # Generate the ID client-side so a plain Core INSERT suffices,
+            # with no RETURNING round-trip or ORM identity-map bookkeeping
+            session_id = uuid4()
+            now = datetime.utcnow()
             async with self.async_session() as session:
-                new_session = ChatSessionModel()
-                session.add(new_session)
+                await session.execute(
+                    insert(ChatSessionModel).values(
+                        session_id=session_id, created_at=now, last_activity_at=now
+                    )
+                )
                 await session.commit()
-                logger.info(f"Created session: {new_session.session_id}")
-                return new_session.session_id
+            logger.info(f"Created session: {session_id}")
+            return session_id
 
         except Exception as e:
             logger.error(f"Failed to create session: {str(e)}")
             raise
 
+    async def create_session_with_messages(
+        self, messages: List[Dict], session_id: Optional[UUID] = None
+    ) -> Tuple[UUID, List[UUID]]:
+        """
+        Create a new chat session and its first messages in one transaction.
+
+        Args:
+            messages: Dicts with ``role``, ``content`` and optional
+                ``selected_text`` / ``context_used``
+            session_id: Optional pre-generated session ID (one is generated if omitted)
+
+        Returns:
+            Tuple of (session ID, message IDs in the same order as ``messages``)
+        """
+        try:
+            session_id = session_id or uuid4()
+            now = datetime.utcnow()
+            rows = _message_rows(session_id, messages, now)
+            async with self.async_session() as session:
+                await session.execute(
+                    insert(ChatSessionModel).values(
+                        session_id=session_id, created_at=now, last_activity_at=now
+                    )
+                )
+                await session.execute(insert(ChatMessageModel), rows)
+                await session.commit()
+            logger.info(f"Created session {session_id} with {len(rows)} messages")
+            return session_id, [row["message_id"] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to create session with messages: {str(e)}")
+            raise
+
     async def get_session(self, session_id: UUID) -> Optional[ChatSessionModel]:
         """
         Get session by ID.
@@ -150,6 +273,8 @@ class ConversationService:
         """
         Save a message to the database.
 
+        The message ID is generated client-side, so no RETURNING is needed.
+
         Args:
             session_id: Session ID
             role: Message role ('user' or 'assistant')
@@ -160,42 +285,72 @@ class ConversationService:
         Returns:
             Message ID
         """
+        message_ids = await self.save_messages_batch(
+            session_id,
+            [
+                {
+                    "role": role,
+                    "content": content,
+                    "selected_text": selected_text,
+                    "context_used": context_used,
+                }
+            ],
+        )
+        return message_ids[0]
+
+    async def save_messages_batch(self, session_id: UUID, messages: List[Dict]) -> List[UUID]:
+        """
+        Save several messages in one round-trip.
+
+        All rows go through a single executemany INSERT inside one transaction.
+        Messages keep their list order in the conversation history.
+
+        Args:
+            session_id: Session ID
+            messages: Dicts with ``role``, ``content`` and optional
+                ``selected_text`` / ``context_used``
+
+        Returns:
+            Message IDs, in the same order as ``messages``
+        """
         try:
+            rows = _message_rows(session_id, messages, datetime.utcnow())
             async with self.async_session() as session:
-                message = ChatMessageModel(
-                    session_id=session_id,
-                    role=role,
-                    content=content,
-                    selected_text=selected_text,
-                    context_used=context_used,
-                )
-                session.add(message)
+                await session.execute(insert(ChatMessageModel), rows)
                 await session.commit()
-                logger.info(f"Saved {role} message to session {session_id}")
-                return message.message_id
+            logger.info(f"Saved {len(rows)} messages to session {session_id}")
+            return [row["message_id"] for row in rows]
 
         except Exception as e:
-            logger.error(f"Failed to save message: {str(e)}")
+            logger.error(f"Failed to save messages: {str(e)}")
             raise
 
-    async def get_conversation_history(self, session_id: UUID) -> List[Dict]:
+    async def get_conversation_history(
+        self, session_id: UUID, limit: Optional[int] = None
+    ) -> List[Dict]:
         """
         Get conversation history for a session.
 
         Args:
             session_id: Session ID
+            limit: Optional cap on the number of most recent messages returned
 
         Returns:
             List of messages in chronological order
         """
         try:
             async with self.async_session() as session:
-                result = await session.execute(
-                    select(ChatMessageModel)
-                    .where(ChatMessageModel.session_id == session_id)
-                    .order_by(ChatMessageModel.created_at.asc())
-                )
+                query = select(ChatMessageModel).where(ChatMessageModel.session_id == session_id)
+                if limit is None:
+                    query = query.order_by(ChatMessageModel.created_at.asc())
+                else:
+                    # Read the newest rows off the (session_id, created_at) index,
+                    # then restore chronological order in memory
+                    query = query.order_by(ChatMessageModel.created_at.desc()).limit(limit)
+                result = await session.execute(query)
                 messages = result.scalars().all()
+                if limit is not None:
+                    messages = list(reversed(messages))
 
                 return [
                     {
@@ -213,6 +368,34 @@ class ConversationService:
             logger.error(f"Failed to get conversation history: {str(e)}")
             raise
 
+    async def get_history_for_llm(self, session_id: UUID, limit: int) -> List[Tuple[str, str]]:
+        """
+        Get the most recent messages of a session as ``(role, content)`` pairs.
+
+        Only the two columns the LLM prompt needs are selected, skipping ORM
+        hydration and JSONB decoding of ``context_used``.
+
+        Args:
+            session_id: Session ID
+            limit: Maximum number of most recent messages
+
+        Returns:
+            List of (role, content) tuples in chronological order
+        """
+        try:
+            async with self.async_session() as session:
+                result = await session.execute(
+                    select(ChatMessageModel.role, ChatMessageModel.content)
+                    .where(ChatMessageModel.session_id == session_id)
+                    .order_by(ChatMessageModel.created_at.desc())
+                    .limit(limit)
+                )
+                return [(role, content) for role, content in reversed(result.all())]
+
+        except Exception as e:
+            logger.error(f"Failed to get conversation history: {str(e)}")
+            raise
+
     async def check_health(self) -> bool:
         """
         Check if database is accessible.
@@ -222,7 +405,11 @@ class ConversationService:
         """
         try:
             async with self.async_session() as session:
-                await session.execute(select(func.count()).select_from(ChatSessionModel))
+                # Stops at the first row, unlike count(*), while still
+                # verifying the table exists
+                await session.execute(
+                    select(literal(1)).select_from(ChatSessionModel).limit(1)
+                )
                 return True
         except Exception as e:
             logger.error(f"Database health check failed: {str(e)}")
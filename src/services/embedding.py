@@ -4,12 +4,16 @@ Gemini embeddings service.
 Generates embeddings for queries and documents using the Gemini API.
 """
 
+import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import List
+import numpy as np
 # 1. CHANGE: Import the new Google Generative AI SDK
-from google import genai
 from google.genai import types as genai_types
 from src.config import settings
+from src.services._gemini import close_client, get_client
 
 logger = logging.getLogger(__name__)
 
@@ -19,26 +23,46 @@ class EmbeddingService:
 
     def __init__(self):
         """Initialize Gemini client."""
-        # 2. CHANGE: Initialize the asynchronous Gemini Client (Gemini SDK)
-        self.client = genai.Client(api_key=settings.gemini_api_key).aio
+        # 2. CHANGE: Use the shared asynchronous Gemini Client (Gemini SDK)
+        self.client = get_client()
         self.model = settings.gemini_embedding_model
         # The dimension property is still useful for vector database initialization,
         # but is no longer required as a parameter in the API call itself.
         self.dimension = settings.gemini_embedding_dimension 
-
-    async def generate_embedding(self, text: str) -> List[float]:
+        # LRU cache of query embeddings keyed on a digest of (model, normalized text)
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # Shared by every batch call, so concurrent batches (e.g. the indexer's
+        # pipeline) stay within one cap on in-flight document requests
+        self._embed_sem = asyncio.Semaphore(settings.embedding_max_concurrency)
+
+    def _cache_key(self, text: str) -> bytes:
+        """Build a compact cache key for a query."""
+        normalized = f"{self.model}\0{text.strip().lower()}"
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+    async def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text, optimized for retrieval query.
 
+        Results are cached per normalized query text (LRU, size
+        ``settings.embedding_cache_size``), so repeated queries skip the API call.
+
         Args:
             text: Input text
 
         Returns:
-            Embedding vector
+            Embedding vector as a 1-D float32 array
 
         Raises:
             Exception: If API call fails
         """
+        key = self._cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            logger.info("Query embedding cache hit")
+            return cached
+
         try:
             # 3. CRITICAL CHANGE: Use client.models.embed_content for single input
             # Use RETRIEVAL_QUERY for the query you want to search with
@@ -53,28 +77,29 @@ class EmbeddingService:
                 ),
             )
             # 4. CHANGE: Extract the embedding from the new response object structure
-            embedding = response.embeddings[0].values
+            embedding = np.asarray(response.embeddings[0].values, dtype=np.float32)
             logger.info(f"Generated query embedding (dimension: {len(embedding)})")
+
+            self._cache[key] = embedding
+            if len(self._cache) > settings.embedding_cache_size:
+                self._cache.popitem(last=False)
             return embedding
 
         except Exception as e:
             logger.error(f"Failed to generate embedding: {str(e)}")
             raise
 
-    async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def _embed_sub_batch(self, texts: List[str]) -> np.ndarray:
         """
-        Generate embeddings for multiple texts in batch, optimized for documents.
+        Embed one API-sized slice of documents.
 
         Args:
-            texts: List of input texts
+            texts: Input texts (at most ``settings.embedding_sub_batch_size``)
 
         Returns:
-            List of embedding vectors
-
-        Raises:
-            Exception: If API call fails
+            Embeddings as a 2-D float32 array, one row per text
         """
-        try:
+        async with self._embed_sem:
             # 5. CRITICAL CHANGE: Use client.models.embed_content for batch input
             # Use RETRIEVAL_DOCUMENT for the documents you are indexing
             response = await self.client.models.embed_content(
@@ -85,11 +110,44 @@ class EmbeddingService:
                     # Optional: output_dimensionality=self.dimension
                 ),
             )
-            # 6. CHANGE: Extract embeddings list from the response
-            embeddings = [item.values for item in response.embeddings]
+        # 6. CHANGE: Extract embeddings list from the response
+        return np.asarray([item.values for item in response.embeddings], dtype=np.float32)
+
+    async def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts in batch, optimized for documents.
+
+        Texts are split into sub-batches of ``settings.embedding_sub_batch_size``
+        which are sent concurrently (at most ``settings.embedding_max_concurrency``
+        in flight across all calls on this service); results keep the input order.
+
+        Args:
+            texts: List of input texts
+
+        Returns:
+            Embeddings as a 2-D ``(len(texts), dimension)`` float32 array
+
+        Raises:
+            Exception: If API call fails
+        """
+        try:
+            size = settings.embedding_sub_batch_size
+            sub_results = await asyncio.gather(
+                *[
+                    self._embed_sub_batch(texts[i : i + size])
+                    for i in range(0, len(texts), size)
+                ]
+            )
+            if not sub_results:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            embeddings = np.concatenate(sub_results)
             logger.info(f"Generated {len(embeddings)} document embeddings in batch")
             return embeddings
 
         except Exception as e:
             logger.error(f"Failed to generate embeddings batch: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def close(self) -> None:
+        """Close the shared Gemini HTTP client (also used by LLMService)."""
+        await close_client()
@@ -5,70 +5,98 @@ Generates grounded responses using Gemini-2.5-flash with RAG context.
 """
 
 import logging
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 # 1. CHANGE: Import the new Google Generative AI SDK (Gen AI SDK)
-from google import genai
 from google.genai import types as genai_types
 from src.config import settings
+from src.services._gemini import get_client
 
 logger = logging.getLogger(__name__)
 
+# Constant parts of the system prompt, built once at import
+_SYSTEM_PROMPT_PREFIX = """You are a helpful AI assistant for the "Physical AI & Humanoid Robotics" textbook.
+
+Your role is to answer questions based ONLY on the provided book content. Follow these guidelines:
+
+1. GROUNDING: Base all answers strictly on the provided context below. Do not use external knowledge.
+2. CITATIONS: Reference specific sources when making claims (e.g., "According to the ROS2 chapter...").
+3. SCOPE: If the question is outside the book's scope, politely state: "I don't have information about that in the documentation. I can only answer questions about Physical AI, robotics, ROS2, and related topics covered in this book."
+4. CLARITY: Explain technical concepts clearly, suitable for students learning robotics.
+5. HONESTY: If the context doesn't contain enough information to answer fully, admit it.
+
+CONTEXT FROM BOOK:
+"""
+
+_SYSTEM_PROMPT_SUFFIX = """
+
+Answer the user's question based on the above context."""
+
+# Stored message roles mapped to Gemini's content roles
+_GEMINI_ROLES = {"user": "user", "assistant": "model"}
+
+# Max system prompts memoized per LLMService
+_PROMPT_CACHE_SIZE = 256
+
 
 class LLMService:
     """Service for generating responses using Gemini chat models."""
 
     def __init__(self):
         """Initialize Gemini client."""
-        # 2. CHANGE: Initialize the Gemini Client
-        # The 'genai.Client' is synchronous by default. We use 'genai.Client().aio' for the async client.
-        # It automatically picks up the GEMINI_API_KEY from environment/settings.
-        self.client = genai.Client(api_key=settings.gemini_api_key).aio
+        # 2. CHANGE: Use the shared asynchronous Gemini Client
+        # It shares its HTTP/2 connection pool with EmbeddingService.
+        self.client = get_client()
         self.model = settings.gemini_chat_model
+        self._prompt_cache: "OrderedDict[tuple, str]" = OrderedDict()
 
     def _build_system_prompt(self, retrieved_chunks: List[Dict]) -> str:
-        # ... (This method remains unchanged, as it only builds a string)
         """
         Build system prompt with retrieved context.
 
+        Prompts are memoized per chunk set, so retries and repeated retrievals
+        reuse the assembled string.
+
         Args:
             retrieved_chunks: List of retrieved document chunks
 
         Returns:
             System prompt with context
         """
-        context_text = "\n\n".join(
-            [
-                f"[Source: {chunk['title']} - {chunk['file_path']}]\n{chunk['chunk_text']}"
-                for chunk in retrieved_chunks
-            ]
+        # file_path + chunk_index identify a chunk; the text hash guards against
+        # serving a stale prompt after the document is re-indexed
+        key = tuple(
+            (chunk["file_path"], chunk["chunk_index"], hash(chunk["chunk_text"]))
+            for chunk in retrieved_chunks
         )
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            self._prompt_cache.move_to_end(key)
+            return cached
 
-        system_prompt = f"""You are a helpful AI assistant for the "Physical AI & Humanoid Robotics" textbook.
-
-Your role is to answer questions based ONLY on the provided book content. Follow these guidelines:
-
-1. GROUNDING: Base all answers strictly on the provided context below. Do not use external knowledge.
-2. CITATIONS: Reference specific sources when making claims (e.g., "According to the ROS2 chapter...").
-3. SCOPE: If the question is outside the book's scope, politely state: "I don't have information about that in the documentation. I can only answer questions about Physical AI, robotics, ROS2, and related topics covered in this book."
-4. CLARITY: Explain technical concepts clearly, suitable for students learning robotics.
-5. HONESTY: If the context doesn't contain enough information to answer fully, admit it.
-
-CONTEXT FROM BOOK:
-{context_text}
-
-Answer the user's question based on the above context."""
+        context_text = "\n\n".join(
+            f"[Source: {chunk['title']} - {chunk['file_path']}]\n{chunk['chunk_text']}"
+            for chunk in retrieved_chunks
+        )
+        system_prompt = _SYSTEM_PROMPT_PREFIX + context_text + _SYSTEM_PROMPT_SUFFIX
 
+        self._prompt_cache[key] = system_prompt
+        if len(self._prompt_cache) > _PROMPT_CACHE_SIZE:
+            self._prompt_cache.popitem(last=False)
         return system_prompt
 
     # 3. CHANGE: Update message format for Gemini's Content object
     def _build_conversation_history(
-        self, conversation_messages: List[Dict], current_query: str, selected_text: Optional[str]
+        self,
+        conversation_messages: List[Tuple[str, str]],
+        current_query: str,
+        selected_text: Optional[str],
     ) -> List[genai_types.Content]:
         """
         Build conversation history for LLM context.
 
         Args:
-            conversation_messages: Previous messages in conversation
+            conversation_messages: Previous (role, content) pairs in conversation
             current_query: Current user query
             selected_text: Optional selected text from page
 
@@ -79,12 +107,12 @@ Answer the user's question based on the above context."""
 
         # Add previous conversation context (last N messages)
         # Note: Gemini uses 'user' and 'model' for roles
-        for msg in conversation_messages[-settings.max_conversation_context :]:
-            # Convert simple dict to Content object
+        for role, content in conversation_messages[-settings.max_conversation_context :]:
+            # Convert (role, content) pair to Content object
             messages.append(
                 genai_types.Content(
-                    role=msg["role"], 
-                    parts=[genai_types.Part.from_text(text=msg["content"])]
+                    role=_GEMINI_ROLES.get(role, role),
+                    parts=[genai_types.Part.from_text(text=content)]
                 )
             )
 
@@ -109,11 +137,46 @@ Question: {current_query}"""
 
         return messages
 
+    def _build_request(
+        self,
+        query: str,
+        retrieved_chunks: List[Dict],
+        conversation_history: Optional[List[Tuple[str, str]]],
+        selected_text: Optional[str],
+    ) -> Tuple[List[genai_types.Content], genai_types.GenerateContentConfig]:
+        """
+        Build the contents and config for a generation request.
+
+        Args:
+            query: User query
+            retrieved_chunks: List of retrieved document chunks
+            conversation_history: Previous (role, content) pairs in conversation
+            selected_text: Optional selected text from page
+
+        Returns:
+            Tuple of (contents, generation config)
+        """
+        # Build system prompt with context
+        system_instruction = self._build_system_prompt(retrieved_chunks)
+
+        # Build conversation history (as list of Content objects)
+        contents = self._build_conversation_history(
+            conversation_history or [], query, selected_text
+        )
+
+        # System instruction is passed in the config, not in the messages list.
+        config = genai_types.GenerateContentConfig(
+            system_instruction=system_instruction, # System prompt goes here
+            temperature=0.7,
+            max_output_tokens=500, # Use max_output_tokens instead of max_tokens
+        )
+        return contents, config
+
     async def generate_response(
         self,
         query: str,
         retrieved_chunks: List[Dict],
-        conversation_history: List[Dict] = None,
+        conversation_history: Optional[List[Tuple[str, str]]] = None,
         selected_text: Optional[str] = None,
     ) -> str:
         """
@@ -121,25 +184,15 @@ Question: {current_query}"""
         ...
         """
         try:
-            # Build system prompt with context
-            system_instruction = self._build_system_prompt(retrieved_chunks)
-
-            # Build conversation history (as list of Content objects)
-            conversation_history = conversation_history or []
-            contents = self._build_conversation_history(
-                conversation_history, query, selected_text
+            contents, config = self._build_request(
+                query, retrieved_chunks, conversation_history, selected_text
             )
 
             # 4. CRITICAL CHANGE: Replace client.chat.completions.create with client.models.generate_content
-            # System instruction is passed in the config, not in the messages list.
             response = await self.client.models.generate_content(
                 model=self.model,
                 contents=contents, # The full conversation history + current query
-                config=genai_types.GenerateContentConfig(
-                    system_instruction=system_instruction, # System prompt goes here
-                    temperature=0.7,
-                    max_output_tokens=500, # Use max_output_tokens instead of max_tokens
-                ),
+                config=config,
             )
 
             # 5. CHANGE: Extract the text from the new response object structure
@@ -153,6 +206,47 @@ Question: {current_query}"""
             # or a content violation (BlockedPromptException).
             raise
 
+    async def generate_response_stream(
+        self,
+        query: str,
+        retrieved_chunks: List[Dict],
+        conversation_history: Optional[List[Tuple[str, str]]] = None,
+        selected_text: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Generate AI response, yielding text fragments as they arrive.
+
+        Args:
+            query: User query
+            retrieved_chunks: List of retrieved document chunks
+            conversation_history: Previous (role, content) pairs in conversation
+            selected_text: Optional selected text from page
+
+        Yields:
+            Response text fragments
+
+        Raises:
+            Exception: If API call fails
+        """
+        try:
+            contents, config = self._build_request(
+                query, retrieved_chunks, conversation_history, selected_text
+            )
+            length = 0
+            async for chunk in await self.client.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+                config=config,
+            ):
+                if chunk.text:
+                    length += len(chunk.text)
+                    yield chunk.text
+            logger.info(f"Streamed response (length: {length} chars)")
+
+        except Exception as e:
+            logger.error(f"Failed to stream response: {str(e)}")
+            raise
+
     async def check_health(self) -> bool:
         """
         Check if Gemini API is accessible.
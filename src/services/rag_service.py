@@ -4,9 +4,13 @@ RAG orchestration service.
 Coordinates the RAG pipeline: embedding → retrieval → generation.
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, List, Dict, Optional, Set, Tuple
 from uuid import UUID
+import numpy as np
+from cachetools import TTLCache
 from src.services.embedding import EmbeddingService
 from src.services.vector_store import VectorStoreService
 from src.services.llm import LLMService
@@ -16,6 +20,12 @@ from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+_NO_CONTEXT_RESPONSE = (
+    "I don't have information about that in the documentation. "
+    "I can only answer questions about Physical AI, robotics, ROS2, "
+    "and related topics covered in this book."
+)
+
 
 class RAGService:
     """Service for orchestrating the RAG pipeline."""
@@ -26,6 +36,212 @@ class RAGService:
         self.vector_store = VectorStoreService()
         self.llm_service = LLMService()
         self.conversation_service = ConversationService()
+        # Retrieval results keyed on the query embedding; the TTL bounds staleness
+        # after re-indexing
+        self._retrieval_cache: TTLCache = TTLCache(
+            maxsize=settings.retrieval_cache_size, ttl=settings.retrieval_cache_ttl
+        )
+        # Fixed random hyperplanes for SimHash cache keys (None keys on the exact
+        # embedding); seeded so keys are stable across restarts
+        self._simhash_planes: Optional[np.ndarray] = None
+        if settings.retrieval_cache_simhash_bits > 0:
+            self._simhash_planes = np.random.default_rng(0).standard_normal(
+                (settings.gemini_embedding_dimension, settings.retrieval_cache_simhash_bits),
+                dtype=np.float32,
+            )
+        # Searches in progress, shared by concurrent identical queries; like cache
+        # entries, each keeps the embedding it was issued for
+        self._retrieval_inflight: Dict[bytes, Tuple[np.ndarray, asyncio.Task]] = {}
+        # Fire-and-forget writes; references keep them from being garbage collected
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    def _same_query(self, query_embedding: np.ndarray, other: np.ndarray) -> bool:
+        """Whether ``other`` is close enough to share retrieval results."""
+        if self._simhash_planes is None:
+            # Exact keys: the blake2b digest of the raw bytes already matched
+            return True
+        norms = np.linalg.norm(query_embedding) * np.linalg.norm(other)
+        if norms == 0:
+            return False
+        return float(query_embedding @ other) / norms >= settings.retrieval_cache_min_similarity
+
+    async def _retrieve(self, query_embedding: np.ndarray) -> List[Dict]:
+        """
+        Search the vector store, reusing cached or in-flight results.
+
+        With ``settings.retrieval_cache_simhash_bits`` set, results are keyed on
+        a SimHash signature of the embedding, so near-duplicate queries reuse
+        each other's results too. A bucket hit is only reused when its query
+        is within ``settings.retrieval_cache_min_similarity`` (cosine) of this one.
+
+        Args:
+            query_embedding: Query embedding vector
+
+        Returns:
+            Retrieved chunks, score-descending
+        """
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        if self._simhash_planes is not None:
+            # Sign of the projection onto each random hyperplane: near-identical
+            # queries land on the same side of every plane and share an entry
+            signature = np.packbits(query_embedding @ self._simhash_planes > 0).tobytes()
+        else:
+            signature = query_embedding.tobytes()
+        key = hashlib.blake2b(
+            signature,
+            digest_size=16,
+            key=f"{settings.top_k_results}:{settings.similarity_threshold}".encode(),
+        ).digest()
+
+        cached = self._retrieval_cache.get(key)
+        if cached is not None and self._same_query(query_embedding, cached[0]):
+            logger.info("Retrieval cache hit")
+            return cached[1]
+
+        inflight = self._retrieval_inflight.get(key)
+        if inflight is not None and self._same_query(query_embedding, inflight[0]):
+            task = inflight[1]
+        else:
+            task = asyncio.ensure_future(
+                self.vector_store.search(
+                    query_embedding=query_embedding,
+                    top_k=settings.top_k_results,
+                    score_threshold=settings.similarity_threshold,
+                )
+            )
+            self._retrieval_inflight[key] = (query_embedding, task)
+
+            def on_done(done: asyncio.Task) -> None:
+                if self._retrieval_inflight.get(key, (None, None))[1] is done:
+                    del self._retrieval_inflight[key]
+                if not done.cancelled() and done.exception() is None:
+                    self._retrieval_cache[key] = (query_embedding, done.result())
+
+            task.add_done_callback(on_done)
+
+        # Shield so one cancelled request doesn't cancel the search for the others
+        return await asyncio.shield(task)
+
+    async def _prepare_context(
+        self, query: str, session_id: Optional[UUID]
+    ) -> Tuple[List[Tuple[str, str]], List[Dict]]:
+        """
+        Load conversation history and retrieve relevant chunks for a query.
+
+        Args:
+            query: User query
+            session_id: Existing session ID, or None for a new session
+
+        Returns:
+            Tuple of (conversation history, retrieved chunks)
+        """
+        # A new session has no history, so only the embedding is needed. For
+        # an existing session, fetch history and embed the query concurrently;
+        # they are independent network round-trips.
+        if session_id is None:
+            conversation_history = []
+            query_embedding = await self.embedding_service.generate_embedding(query)
+        else:
+            logger.info(f"Using existing session: {session_id}")
+            conversation_history, query_embedding = await asyncio.gather(
+                self.conversation_service.get_history_for_llm(
+                    session_id, limit=settings.max_conversation_context
+                ),
+                self.embedding_service.generate_embedding(query),
+            )
+            logger.info(f"Loaded {len(conversation_history)} previous messages")
+        logger.info("Generated query embedding")
+
+        retrieved_chunks = await self._retrieve(query_embedding)
+        logger.info(f"Retrieved {len(retrieved_chunks)} relevant chunks")
+        return conversation_history, retrieved_chunks
+
+    def _build_sources(
+        self, retrieved_chunks: List[Dict]
+    ) -> Tuple[List[Source], Optional[Dict]]:
+        """
+        Format sources and context metadata for retrieved chunks.
+
+        Args:
+            retrieved_chunks: Retrieved chunks, score-descending
+
+        Returns:
+            Tuple of (sources deduplicated by file_path, context metadata or
+            None when nothing was retrieved)
+        """
+        if not retrieved_chunks:
+            # Store NULL rather than an empty chunk list
+            return [], None
+
+        # Collect context metadata for every chunk in the same pass. Search
+        # results are score-descending, so the first chunk per file is its best.
+        seen_files = set()
+        sources = []
+        chunks_meta = []
+        for chunk in retrieved_chunks:
+            file_path = chunk["file_path"]
+            chunks_meta.append(
+                {
+                    "title": chunk["title"],
+                    "file_path": file_path,
+                    "relevance_score": chunk["relevance_score"],
+                }
+            )
+            if file_path in seen_files:
+                continue
+            seen_files.add(file_path)
+            sources.append(
+                Source(
+                    title=chunk["title"],
+                    file_path=file_path,
+                    relevance_score=chunk["relevance_score"],
+                    excerpt=chunk["chunk_text"][:500],  # Limit excerpt length
+                )
+            )
+
+        context_metadata = {
+            "chunks": chunks_meta,
+            "retrieval_count": len(retrieved_chunks),
+        }
+        return sources, context_metadata
+
+    async def _save_exchange(
+        self,
+        session_id: Optional[UUID],
+        query: str,
+        selected_text: Optional[str],
+        response: str,
+        context_metadata: Optional[Dict],
+        new_session: bool,
+    ) -> UUID:
+        """
+        Save the user and assistant messages together.
+
+        A new session is created in the same transaction.
+
+        Args:
+            session_id: Session ID; may be None for a new session to have one generated
+            query: User query
+            selected_text: Optional selected text from page
+            response: Assistant response
+            context_metadata: Retrieval metadata for the assistant message
+            new_session: Whether the session still has to be created
+
+        Returns:
+            Session ID
+        """
+        messages = [
+            {"role": "user", "content": query, "selected_text": selected_text},
+            {"role": "assistant", "content": response, "context_used": context_metadata},
+        ]
+        if new_session:
+            session_id, _ = await self.conversation_service.create_session_with_messages(
+                messages, session_id=session_id
+            )
+            logger.info(f"Created new session: {session_id}")
+        else:
+            await self.conversation_service.save_messages_batch(session_id, messages)
+        return session_id
 
     async def process_query(
         self,
@@ -48,41 +264,15 @@ class RAGService:
             Exception: If any step in pipeline fails
         """
         try:
-            # Step 1: Create or get session
-            if session_id is None:
-                session_id = await self.conversation_service.create_session()
-                logger.info(f"Created new session: {session_id}")
-            else:
-                logger.info(f"Using existing session: {session_id}")
-
-            # Step 2: Get conversation history
-            conversation_history = await self.conversation_service.get_conversation_history(
-                session_id
-            )
-            logger.info(f"Loaded {len(conversation_history)} previous messages")
-
-            # Step 3: Generate query embedding
-            query_embedding = await self.embedding_service.generate_embedding(query)
-            logger.info("Generated query embedding")
-
-            # Step 4: Search vector store
-            retrieved_chunks = await self.vector_store.search(
-                query_embedding=query_embedding,
-                top_k=settings.top_k_results,
-                score_threshold=settings.similarity_threshold,
+            # Steps 1-4: Load history and retrieve relevant chunks
+            conversation_history, retrieved_chunks = await self._prepare_context(
+                query, session_id
             )
-            logger.info(f"Retrieved {len(retrieved_chunks)} relevant chunks")
 
-            # Step 5: Check if we have relevant results
+            # Steps 5-6: Generate response with LLM if we have relevant results
             if not retrieved_chunks:
-                response = (
-                    "I don't have information about that in the documentation. "
-                    "I can only answer questions about Physical AI, robotics, ROS2, "
-                    "and related topics covered in this book."
-                )
-                sources = []
+                response = _NO_CONTEXT_RESPONSE
             else:
-                # Step 6: Generate response with LLM
                 response = await self.llm_service.generate_response(
                     query=query,
                     retrieved_chunks=retrieved_chunks,
@@ -91,53 +281,17 @@ class RAGService:
                 )
                 logger.info("Generated LLM response")
 
-                # Step 7: Format sources (deduplicate by file_path, keeping highest score)
-                seen_files = {}
-                for chunk in retrieved_chunks:
-                    file_path = chunk["file_path"]
-                    # Keep only the highest-scoring chunk for each file
-                    if file_path not in seen_files or chunk["relevance_score"] > seen_files[file_path]["relevance_score"]:
-                        seen_files[file_path] = chunk
-
-                # Create Source objects from deduplicated chunks
-                sources = [
-                    Source(
-                        title=chunk["title"],
-                        file_path=chunk["file_path"],
-                        relevance_score=chunk["relevance_score"],
-                        excerpt=chunk["chunk_text"][:500],  # Limit excerpt length
-                    )
-                    for chunk in seen_files.values()
-                ]
-                # Sort by relevance score (highest first)
-                sources.sort(key=lambda x: x.relevance_score, reverse=True)
-
-            # Step 8: Save user message
-            await self.conversation_service.save_message(
-                session_id=session_id,
-                role="user",
-                content=query,
-                selected_text=selected_text,
-            )
+            # Step 7: Format sources
+            sources, context_metadata = self._build_sources(retrieved_chunks)
 
-            # Step 9: Save assistant message with context
-            context_metadata = {
-                "chunks": [
-                    {
-                        "title": chunk["title"],
-                        "file_path": chunk["file_path"],
-                        "relevance_score": chunk["relevance_score"],
-                    }
-                    for chunk in retrieved_chunks
-                ],
-                "retrieval_count": len(retrieved_chunks),
-            }
-
-            await self.conversation_service.save_message(
-                session_id=session_id,
-                role="assistant",
-                content=response,
-                context_used=context_metadata,
+            # Step 8: Save user and assistant messages
+            session_id = await self._save_exchange(
+                session_id,
+                query,
+                selected_text,
+                response,
+                context_metadata,
+                new_session=session_id is None,
             )
 
             logger.info(f"RAG pipeline completed for session {session_id}")
@@ -147,6 +301,93 @@ class RAGService:
             logger.error(f"RAG pipeline failed: {str(e)}")
             raise
 
+    async def process_query_stream(
+        self,
+        query: str,
+        session_id: Optional[UUID] = None,
+        selected_text: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process user query through RAG pipeline, streaming the response.
+
+        Yields ``("sources", (sources, session_id))`` once retrieval is done,
+        then ``("token", text)`` for each response fragment. A new session row
+        is written before its ID is yielded, so follow-up requests can use it
+        right away; the messages are persisted in a background task after the
+        last fragment, so the caller isn't held up by that write.
+
+        Args:
+            query: User query
+            session_id: Optional existing session ID
+            selected_text: Optional selected text from page
+
+        Yields:
+            (event, data) tuples
+
+        Raises:
+            Exception: If any step in pipeline fails
+        """
+        try:
+            conversation_history, retrieved_chunks = await self._prepare_context(
+                query, session_id
+            )
+            if session_id is None:
+                # The client gets the ID with the sources, so the row must
+                # exist before then
+                session_id = await self.conversation_service.create_session()
+                logger.info(f"Created new session: {session_id}")
+
+            sources, context_metadata = self._build_sources(retrieved_chunks)
+            yield "sources", (sources, session_id)
+
+            if not retrieved_chunks:
+                fragments = [_NO_CONTEXT_RESPONSE]
+                yield "token", _NO_CONTEXT_RESPONSE
+            else:
+                fragments = []
+                async for text in self.llm_service.generate_response_stream(
+                    query=query,
+                    retrieved_chunks=retrieved_chunks,
+                    conversation_history=conversation_history,
+                    selected_text=selected_text,
+                ):
+                    fragments.append(text)
+                    yield "token", text
+                logger.info("Streamed LLM response")
+
+            self._run_in_background(
+                self._save_exchange(
+                    session_id,
+                    query,
+                    selected_text,
+                    "".join(fragments),
+                    context_metadata,
+                    new_session=False,
+                )
+            )
+            logger.info(f"RAG pipeline streamed for session {session_id}")
+
+        except Exception as e:
+            logger.error(f"RAG streaming pipeline failed: {str(e)}")
+            raise
+
+    def _run_in_background(self, coro: Awaitable) -> None:
+        """Run a coroutine as a task, holding a reference until it finishes."""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+
+        def on_done(done: asyncio.Task) -> None:
+            self._background_tasks.discard(done)
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Background task failed: {str(done.exception())}")
+
+        task.add_done_callback(on_done)
+
+    async def wait_for_background_tasks(self) -> None:
+        """Wait for pending background writes, e.g. before shutdown."""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
     async def get_session_history(self, session_id: UUID) -> List[Dict]:
         """
         Get conversation history for a session.
@@ -166,18 +407,15 @@ class RAGService:
         Returns:
             Dictionary with service statuses
         """
-        health = {}
-
-        # Check Qdrant
-        qdrant_healthy = await self.vector_store.check_health()
-        health["qdrant"] = "up" if qdrant_healthy else "down"
-
-        # Check Postgres
-        postgres_healthy = await self.conversation_service.check_health()
-        health["postgres"] = "up" if postgres_healthy else "down"
-
-        # Check OpenAI
-        openai_healthy = await self.llm_service.check_health()
-        health["openai"] = "up" if openai_healthy else "down"
-
-        return health
+        # The backends are independent, so probe them concurrently; a probe
+        # that raises counts as down
+        results = await asyncio.gather(
+            self.vector_store.check_health(),
+            self.conversation_service.check_health(),
+            self.llm_service.check_health(),
+            return_exceptions=True,
+        )
+        return {
+            name: "up" if healthy is True else "down"
+            for name, healthy in zip(("qdrant", "postgres", "gemini"), results)
+        }
@@ -5,16 +5,56 @@ Provides functions to extract text from markdown/MDX files and clean content
 for embedding generation.
 """
 
+import html
+import logging
 import re
-from typing import Dict, Any
-from bs4 import BeautifulSoup
-import markdown
+from typing import Dict, Any, Tuple
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# LibYAML's C loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_FENCED_CODE_RE = re.compile(r"```[\s\S]*?```")
+_INLINE_CODE_RE = re.compile(r"`[^`]*`")
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\S+")
+
+# Every markdown construct markdown_to_text rewrites, as one alternation so the
+# document is scanned once; _strip_markup dispatches on the group that matched
+_MARKUP_RE = re.compile(
+    r"""
+      (?P<fence>```[\s\S]*?```)                        # fenced code block
+    | (?P<code>`[^`]*`)                                # inline code
+    | !\[(?P<alt>[^\]]*)\]\([^)]*\)                    # image -> alt text
+    | \[(?P<link>[^\]]*)\]\([^)]*\)                    # link -> link text
+    | (?P<refdef>^[ ]{0,3}\[[^\]]+\]:[^\n]*$)           # reference definition
+    | (?P<tag></?[A-Za-z][^>]*>)                       # HTML / JSX tag
+    | (?P<rule>^[ \t|:]*(?:-[ \t|:]*){3,}$             # rule / table separator
+        |^[ \t]*(?:[*_][ \t]*){3,}$)
+    | (?P<block>^[ \t]*(?:>[ \t]?)*                    # blockquote, heading,
+        (?:\#{1,6}[ \t]+|[-*+][ \t]+|\d+[.)][ \t]+)     #   list item markers
+        |^[ \t]*(?:>[ \t]?)+)
+    | (?P<hclose>[ \t]+\#+[ \t]*$)                     # closing heading hashes
+    | (?P<emph>(?P<star>\*{1,3}|~~)(?=\S)              # paired emphasis -> its
+        (?P<startext>.+?)(?<=\S)(?P=star)               #   text; a lone * (2*3)
+        |(?<!\w)(?P<under>_{1,3})(?=\S)                #   or intraword _
+        (?P<undertext>.+?)(?<=\S)(?P=under)(?!\w))     #   (snake_case) is kept
+    | (?P<pipe>\|)                                     # table cell border
+    | \\(?P<escaped>[\\`*_{}\[\]()\#+\-.!|>])          # backslash escape
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
 
 
 def extract_frontmatter(content: str) -> tuple[Dict[str, Any], str]:
     """
     Extract YAML frontmatter from markdown content.
 
+    Frontmatter is parsed as YAML (lists, multi-line and typed values
+    included); invalid or non-mapping frontmatter yields an empty dict.
+
     Args:
         content: Raw markdown content with optional frontmatter
 
@@ -28,12 +68,13 @@ def extract_frontmatter(content: str) -> tuple[Dict[str, Any], str]:
     if content.startswith("---"):
         parts = content.split("---", 2)
         if len(parts) >= 3:
-            # Parse YAML frontmatter (simple key-value pairs)
-            frontmatter_text = parts[1].strip()
-            for line in frontmatter_text.split("\n"):
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    frontmatter[key.strip()] = value.strip().strip('"').strip("'")
+            try:
+                parsed = yaml.load(parts[1], Loader=_YAML_LOADER)
+            except yaml.YAMLError as e:
+                logger.warning(f"Invalid YAML frontmatter: {str(e)}")
+                parsed = None
+            if isinstance(parsed, dict):
+                frontmatter = parsed
             body = parts[2].strip()
 
     return frontmatter, body
@@ -50,18 +91,57 @@ def remove_code_blocks(text: str) -> str:
         Text with code blocks removed
     """
     # Remove fenced code blocks (```...```)
-    text = re.sub(r"```[\s\S]*?```", "", text)
+    text = _FENCED_CODE_RE.sub("", text)
 
     # Remove inline code (`...`)
-    text = re.sub(r"`[^`]*`", "", text)
+    text = _INLINE_CODE_RE.sub("", text)
 
     return text
 
 
+def _strip_markup(match: "re.Match[str]") -> str:
+    """Replacement callback for _MARKUP_RE."""
+    kind = match.lastgroup
+    if kind in ("alt", "link"):
+        # Link text can itself contain markup
+        return _MARKUP_RE.sub(_strip_markup, match.group(kind))
+    if kind == "emph":
+        inner = match.group("startext") or match.group("undertext")
+        return _MARKUP_RE.sub(_strip_markup, inner)
+    if kind == "escaped":
+        return match.group(kind)
+    if kind in ("tag", "pipe"):
+        # Keep words on either side apart
+        return " "
+    return ""
+
+
+def parse_markdown(content: str, fallback_title: str = "Untitled") -> Tuple[str, str]:
+    """
+    Extract the title and plain text of a markdown document.
+
+    Parses the frontmatter once for both, unlike calling
+    get_title_from_frontmatter and markdown_to_text separately.
+
+    Args:
+        content: Markdown content with optional frontmatter
+        fallback_title: Default title if none found
+
+    Returns:
+        Tuple of (title, plain text)
+    """
+    frontmatter, body = extract_frontmatter(content)
+    title = frontmatter.get("title")
+    return (str(title) if title is not None else fallback_title), _body_to_text(body)
+
+
 def markdown_to_text(content: str) -> str:
     """
     Convert markdown to plain text for embedding generation.
 
+    Markup is stripped directly with one regex pass rather than rendering
+    HTML and parsing it back; code is dropped, link and image text kept.
+
     Args:
         content: Markdown content
 
@@ -70,19 +150,20 @@ def markdown_to_text(content: str) -> str:
     """
     # Remove frontmatter
     _, body = extract_frontmatter(content)
+    return _body_to_text(body)
 
-    # Remove code blocks
-    body = remove_code_blocks(body)
 
-    # Convert markdown to HTML
-    html = markdown.markdown(body, extensions=["extra", "nl2br"])
+def _body_to_text(body: str) -> str:
+    """Strip markup from a markdown body (frontmatter already removed)."""
+    # Remove code and markdown/HTML markup
+    text = _MARKUP_RE.sub(_strip_markup, body)
 
-    # Extract text from HTML
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text(separator=" ", strip=True)
+    # Decode HTML entities (e.g. &nbsp;, &amp;) left in the source
+    if "&" in text:
+        text = html.unescape(text)
 
     # Clean up whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
 
     return text
 
@@ -91,6 +172,9 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list[st
     """
     Split text into overlapping chunks.
 
+    Chunks are sliced straight out of ``text`` between word offsets, so each
+    chunk is copied once and keeps the original whitespace between words.
+
     Args:
         text: Input text
         chunk_size: Size of each chunk in words
@@ -99,24 +183,25 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list[st
     Returns:
         List of text chunks
     """
-    words = text.split()
-    chunks = []
-
-    if len(words) <= chunk_size:
+    starts = []
+    ends = []
+    for match in _WORD_RE.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+    n_words = len(starts)
+
+    if n_words <= chunk_size:
         return [text]
 
-    start = 0
-    while start < len(words):
-        end = start + chunk_size
-        chunk_words = words[start:end]
-        chunks.append(" ".join(chunk_words))
-
-        # Move start forward by (chunk_size - overlap)
-        start += chunk_size - overlap
-
-        # Prevent infinite loop if overlap >= chunk_size
-        if overlap >= chunk_size:
-            start += 1
+    # Step by (chunk_size - overlap), at least one word to avoid looping forever
+    step = max(chunk_size - overlap, 1)
+    chunks = []
+    for start in range(0, n_words, step):
+        end = min(start + chunk_size, n_words)
+        chunks.append(text[starts[start] : ends[end - 1]])
+        # Stop once a window reaches the end; later windows would be subsets of it
+        if end == n_words:
+            break
 
     return chunks
 
@@ -133,4 +218,5 @@ def get_title_from_frontmatter(content: str, fallback: str = "Untitled") -> str:
         Document title
     """
     frontmatter, _ = extract_frontmatter(content)
-    return frontmatter.get("title", fallback)
+    title = frontmatter.get("title")
+    return str(title) if title is not None else fallback
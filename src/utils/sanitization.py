@@ -7,6 +7,73 @@ Provides validation and sanitization functions to protect against malicious inpu
 import re
 from typing import Optional
 
+# Patterns are compiled once at import rather than on every request.
+
+# Potential system-level commands removed from queries, unioned so one scan
+# covers all of them. Each contains ':', '[', '<' or '#'; sanitize_query relies
+# on that to skip the scan, so keep it true when adding patterns.
+_MALICIOUS_RE = re.compile(
+    "|".join(
+        f"(?:{pattern})"
+        for pattern in (
+            r"system\s*:",  # System prompts
+            r"assistant\s*:",  # Role manipulation
+            r"user\s*:",  # Role manipulation
+            r"<\|.*?\|>",  # Special tokens
+            r"\[INST\]",  # Instruction markers
+            r"\[/INST\]",  # Instruction markers
+            r"###\s*Instruction",  # Instruction headers
+            r"###\s*System",  # System headers
+        )
+    ),
+    re.IGNORECASE,
+)
+
+# Prompt injection indicators
+_INJECTION_PATTERNS = (
+    r"ignore\s+(previous|above|all)\s+(instructions|prompts?)",
+    r"disregard\s+.*?(instructions|rules)",
+    r"new\s+instructions?\s*:",
+    r"system\s+override",
+    r"admin\s+mode",
+    r"developer\s+mode",
+    r"jailbreak",
+    r"you\s+are\s+now",
+    r"act\s+as\s+(if|though)",
+)
+
+# Unioned so one scan covers all of them; used when Hyperscan is unavailable
+_INJECTION_RE = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in _INJECTION_PATTERNS), re.IGNORECASE
+)
+
+# Hyperscan (optional, x86-64 only) matches all indicators in one SIMD DFA pass
+try:
+    import hyperscan
+
+    _INJECTION_DB: Optional["hyperscan.Database"] = hyperscan.Database()
+    _INJECTION_DB.compile(
+        expressions=[pattern.encode() for pattern in _INJECTION_PATTERNS],
+        # Only ASCII text is scanned here (see detect_prompt_injection)
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH]
+        * len(_INJECTION_PATTERNS),
+    )
+    _INJECTION_SCRATCH = hyperscan.Scratch(_INJECTION_DB)
+except ImportError:
+    _INJECTION_DB = None
+
+
+def _stop_on_match(*args) -> bool:
+    """Hyperscan match handler: returning True halts the scan at the first hit."""
+    return True
+
+
+_UUID_RE = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
+)
+_EXCESS_NEWLINES_RE = re.compile(r"\n{3,}")
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 def sanitize_query(query: str, max_length: int = 1000) -> str:
     """
@@ -32,26 +99,20 @@ def sanitize_query(query: str, max_length: int = 1000) -> str:
     if len(query) > max_length:
         raise ValueError(f"Query exceeds maximum length of {max_length} characters")
 
-    # Remove potential system-level commands
-    malicious_patterns = [
-        r"system\s*:",  # System prompts
-        r"assistant\s*:",  # Role manipulation
-        r"user\s*:",  # Role manipulation
-        r"<\|.*?\|>",  # Special tokens
-        r"\[INST\]",  # Instruction markers
-        r"\[/INST\]",  # Instruction markers
-        r"###\s*Instruction",  # Instruction headers
-        r"###\s*System",  # System headers
-    ]
-
-    for pattern in malicious_patterns:
-        query = re.sub(pattern, "", query, flags=re.IGNORECASE)
+    # Remove potential system-level commands; repeat while anything was removed,
+    # since a removal can splice together a new marker (e.g. "sys[INST]tem:").
+    # Every marker contains one of ':', '[', '<', '#', so queries without them
+    # (most of them) skip the regex after a few C-level substring scans.
+    if ":" in query or "[" in query or "<" in query or "#" in query:
+        removed = 1
+        while removed:
+            query, removed = _MALICIOUS_RE.subn("", query)
 
     # Limit consecutive newlines
-    query = re.sub(r"\n{3,}", "\n\n", query)
+    query = _EXCESS_NEWLINES_RE.sub("\n\n", query)
 
     # Remove excessive whitespace
-    query = re.sub(r"\s+", " ", query).strip()
+    query = _WHITESPACE_RE.sub(" ", query).strip()
 
     return query
 
@@ -78,7 +139,7 @@ def sanitize_selected_text(text: Optional[str], min_length: int = 1, max_length:
         return None
 
     # Remove excessive whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
 
     return text
 
@@ -93,8 +154,7 @@ def validate_session_id(session_id: str) -> bool:
     Returns:
         True if valid UUID format, False otherwise
     """
-    uuid_pattern = r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"
-    return bool(re.match(uuid_pattern, session_id, re.IGNORECASE))
+    return bool(_UUID_RE.match(session_id))
 
 
 def detect_prompt_injection(text: str) -> bool:
@@ -107,20 +167,14 @@ def detect_prompt_injection(text: str) -> bool:
     Returns:
         True if potential injection detected, False otherwise
     """
-    injection_indicators = [
-        r"ignore\s+(previous|above|all)\s+(instructions|prompts?)",
-        r"disregard\s+.*?(instructions|rules)",
-        r"new\s+instructions?\s*:",
-        r"system\s+override",
-        r"admin\s+mode",
-        r"developer\s+mode",
-        r"jailbreak",
-        r"you\s+are\s+now",
-        r"act\s+as\s+(if|though)",
-    ]
-
-    for pattern in injection_indicators:
-        if re.search(pattern, text, flags=re.IGNORECASE):
-            return True
-
+    # re folds case per Unicode ("ı" and "İ" match "i" under IGNORECASE) and
+    # Hyperscan cannot, so non-ASCII text always goes through re
+    if _INJECTION_DB is None or not text.isascii():
+        return _INJECTION_RE.search(text) is not None
+    try:
+        _INJECTION_DB.scan(
+            text.encode("ascii"), match_event_handler=_stop_on_match, scratch=_INJECTION_SCRATCH
+        )
+    except hyperscan.ScanTerminated:
+        return True
     return False
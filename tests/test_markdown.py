@@ -0,0 +1,58 @@
+"""Tests for markdown parsing utilities."""
+
+import pytest
+
+from src.utils.markdown import chunk_text, markdown_to_text, parse_markdown
+
+
+@pytest.mark.parametrize(
+    "markdown, text",
+    [
+        ("2*3 = 6", "2*3 = 6"),
+        ("a * b * c", "a * b * c"),
+        ("x_1 + y_2", "x_1 + y_2"),
+        ("call snake_case_name here", "call snake_case_name here"),
+    ],
+)
+def test_markdown_to_text_keeps_unpaired_markers(markdown, text):
+    assert markdown_to_text(markdown) == text
+
+
+@pytest.mark.parametrize(
+    "markdown, text",
+    [
+        ("**bold** and *it* and ***both***", "bold and it and both"),
+        ("_under_ and __strong__", "under and strong"),
+        ("~~gone~~ text", "gone text"),
+        ("**see [the docs](https://example.com)** now", "see the docs now"),
+    ],
+)
+def test_markdown_to_text_strips_paired_emphasis(markdown, text):
+    assert markdown_to_text(markdown) == text
+
+
+def test_markdown_to_text_strips_structure_and_code():
+    markdown = "# Title\n\n- item `code`\n\n```py\nx = 1\n```\n\n> quote with ![alt](img.png)"
+    assert markdown_to_text(markdown) == "Title item quote with alt"
+
+
+def test_parse_markdown_reads_frontmatter_title():
+    title, text = parse_markdown("---\ntitle: Intro\ntags: [a, b]\n---\nHello *world*")
+    assert title == "Intro"
+    assert text == "Hello world"
+
+
+def test_parse_markdown_falls_back_on_invalid_frontmatter():
+    title, text = parse_markdown("---\ntitle: [unclosed\n---\nBody", fallback_title="Doc")
+    assert title == "Doc"
+    assert text == "Body"
+
+
+def test_chunk_text_overlaps_windows():
+    words = " ".join(str(i) for i in range(10))
+    assert chunk_text(words, chunk_size=4, overlap=2) == [
+        "0 1 2 3",
+        "2 3 4 5",
+        "4 5 6 7",
+        "6 7 8 9",
+    ]